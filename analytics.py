@@ -1,9 +1,15 @@
 import datetime
+from itertools import accumulate
+
+# Window sizes (in days) used for the rolling trends report
+TREND_WINDOWS = (7, 30, 90)
 
 # Define the Analytics class for habit analysis
 class Analytics:
     def __init__(self, db):
         self.db = db
+        # Cache of cumulative completion counts per habit, keyed by habit ID
+        self._prefixCache = {}
 
     def calculateLongestStreakAll(self):
         """Show all habits with the highest streak for daily and weekly habits."""
@@ -51,7 +57,7 @@ class Analytics:
     def calculateLongestStreakForHabit(self, habit_id):
         habit = self.db.getHabit(habit_id)
         if habit:
-            streak = habit.calculateStreak()
+            streak = habit.calculateStreakFromRuns()
             print(f"Longest streak for habit '{habit.title}' is {streak}")
         else:
             print("Habit not found.")
@@ -95,6 +101,23 @@ class Analytics:
 
         return total_completions, total_expected_completions, completion_percentage
 
+    def calculateCompletionPercentageFromRuns(self, habit):
+        """Calculate the completion percentage like calculateCompletionPercentage, from the habit's completion runs."""
+        runs = habit.completionRuns
+        if not runs:
+            return 0, 0, 0
+
+        days_since_first = datetime.date.today().toordinal() - runs[0][0]
+        total_expected_completions = self._expectedCompletions(habit, days_since_first + 1)
+        total_completions = sum(end - start + 1 for start, end in runs)
+
+        if total_expected_completions > 0:
+            completion_percentage = (total_completions / total_expected_completions) * 100
+        else:
+            completion_percentage = 0
+
+        return total_completions, total_expected_completions, completion_percentage
+
     def showCompletionRates(self):
         """Show the completion percentage for each habit sorted from highest to lowest."""
         habits = self.db.getAllHabits()
@@ -102,7 +125,7 @@ class Analytics:
 
         # Gather the completion data for each habit
         for habit_id, habit in habits:
-            total_completions, total_expected_completions, completion_percentage = self.calculateCompletionPercentage(habit)
+            total_completions, total_expected_completions, completion_percentage = self.calculateCompletionPercentageFromRuns(habit)
             completion_data.append((habit.title, completion_percentage, total_completions, total_expected_completions))
 
         # Sort the list by completion percentage (index 1), in descending order
@@ -113,6 +136,109 @@ class Analytics:
             print(f"Habit: {title}, Completion Rate: {completion_percentage:.2f}% "
                   f"(Actual: {total_completions}, Expected: {total_expected_completions})")
 
+    def _expectedCompletions(self, habit, span_days):
+        """Return the number of expected completions over a span of days, matching calculateCompletionPercentage."""
+        if habit.periodicity == 'weekly':
+            return ((span_days - 1) // 7) + 1
+        return span_days
+
+    def _getCompletionPrefix(self, habit_id, habit, today):
+        """Return (first_ordinal, prefix) where prefix[i] is the number of completion days before first_ordinal + i.
+
+        The array is built once in O(days) and reused until the habit's completion runs or the current day change.
+        """
+        runs = habit.completionRuns
+        if not runs:
+            return None, None
+
+        # Compare the runs themselves so any change to the completions invalidates the cached array
+        signature = (tuple(runs), today)
+        cached = self._prefixCache.get(habit_id)
+        if cached and cached[0] == signature:
+            return cached[1], cached[2]
+
+        first_ordinal = runs[0][0]
+        total_days = max(today.toordinal() - first_ordinal + 1, 0)
+
+        # Mark each completed day up to today, then accumulate into a cumulative count
+        completed = bytearray(total_days)
+        for start, end in runs:
+            start_index = start - first_ordinal
+            end_index = min(end - first_ordinal, total_days - 1)
+            if start_index <= end_index:
+                completed[start_index:end_index + 1] = b'\x01' * (end_index - start_index + 1)
+        prefix = list(accumulate(completed, initial=0))
+
+        self._prefixCache[habit_id] = (signature, first_ordinal, prefix)
+        return first_ordinal, prefix
+
+    def _windowRate(self, habit, prefix, end_index, window):
+        """Return the completion percentage for the window of days ending at end_index, or None if it predates the habit."""
+        if end_index < 0:
+            return None
+        start_index = max(0, end_index - window + 1)
+        completions = prefix[end_index + 1] - prefix[start_index]
+        expected = self._expectedCompletions(habit, end_index - start_index + 1)
+        return (completions / expected) * 100
+
+    def calculateRollingRates(self, habit_id, habit, window):
+        """Return a list of (date, completion percentage) for every day since the first completion, over a rolling window."""
+        today = datetime.date.today()
+        first_ordinal, prefix = self._getCompletionPrefix(habit_id, habit, today)
+        if prefix is None:
+            return []
+
+        rates = []
+        for index in range(len(prefix) - 1):
+            date = datetime.date.fromordinal(first_ordinal + index)
+            rates.append((date, self._windowRate(habit, prefix, index, window)))
+        return rates
+
+    def calculateTrends(self, habit_id, habit, windows=TREND_WINDOWS):
+        """Return {window: (current rate, previous period rate, delta)} for a habit.
+
+        The previous period is the window immediately before the current one; its rate and the delta are None
+        when the habit had not been started yet. Completions dated after today are ignored.
+        """
+        today = datetime.date.today()
+        first_ordinal, prefix = self._getCompletionPrefix(habit_id, habit, today)
+        trends = {}
+        for window in windows:
+            # No completions up to and including today
+            if prefix is None or len(prefix) == 1:
+                trends[window] = (0, None, None)
+                continue
+            today_index = len(prefix) - 2
+            current_rate = self._windowRate(habit, prefix, today_index, window)
+            previous_rate = self._windowRate(habit, prefix, today_index - window, window)
+            delta = current_rate - previous_rate if previous_rate is not None else None
+            trends[window] = (current_rate, previous_rate, delta)
+        return trends
+
+    def showTrends(self):
+        """Show rolling completion rates and period-over-period changes for each habit."""
+        habits = self.db.getAllHabits()
+
+        # Drop cached data for habits that have since been deleted
+        habit_ids = {habit_id for habit_id, _ in habits}
+        for habit_id in list(self._prefixCache):
+            if habit_id not in habit_ids:
+                del self._prefixCache[habit_id]
+
+        header = f"{'Habit':<24}" + "".join(f" {f'{window}d':>10} {'change':>8}" for window in TREND_WINDOWS)
+        print(header)
+        print("-" * len(header))
+
+        for habit_id, habit in habits:
+            trends = self.calculateTrends(habit_id, habit)
+            line = f"{habit.title:<24}"
+            for window in TREND_WINDOWS:
+                current_rate, previous_rate, delta = trends[window]
+                rate = f"{current_rate:.1f}%" if current_rate is not None else "n/a"
+                change = f"{delta:+.1f}" if delta is not None else "n/a"
+                line += f" {rate:>10} {change:>8}"
+            print(line)
+
     def showAnalytics(self):
         print("\n--- Longest Streak ---")
         self.calculateLongestStreakAll()
@@ -120,3 +246,5 @@ class Analytics:
         self.analyseByCategory()
         print("\n--- Completion Rates (sorted by highest to lowest) ---\n")
         self.showCompletionRates()
+        print("\n--- Completion Trends (rolling windows) ---\n")
+        self.showTrends()
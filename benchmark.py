@@ -0,0 +1,123 @@
+import datetime
+import os
+import random
+import tempfile
+import timeit
+from analytics import Analytics
+from database import SQLiteDB
+from habit import Habit, mergeRuns
+
+# Benchmark the rolling trends report against recounting every window from scratch,
+# and the database size and load time before and after archiving old completions into runs
+
+YEARS = 5
+HABITS = 10
+WINDOW = 90
+RETENTION_DAYS = 90
+
+def build_habit(years, completion_rate=0.8):
+    """Create a daily habit with a multi-year history, completed on each day with the given probability."""
+    habit = Habit("Benchmark Habit", periodicity='daily')
+    today = datetime.date.today().toordinal()
+    # Hold the history as runs, as habits loaded from the database do
+    habit.completionRuns = mergeRuns((today - i, today - i)
+                                     for i in range(years * 365) if random.random() < completion_rate)
+    return habit
+
+def naive_rolling_rates(habit, window):
+    """Recount the completions inside the window for every day (O(days * window))."""
+    history = {datetime.date.fromordinal(ordinal)
+               for start, end in habit.completionRuns for ordinal in range(start, end + 1)}
+    first_date = min(history)
+    today = datetime.date.today()
+    rates = []
+    date = first_date
+    while date <= today:
+        start = max(first_date, date - datetime.timedelta(days=window - 1))
+        days = (date - start).days + 1
+        completions = sum(1 for i in range(days) if start + datetime.timedelta(days=i) in history)
+        rates.append((date, completions / days * 100))
+        date += datetime.timedelta(days=1)
+    return rates
+
+def benchmark_archive(habits):
+    """Measure database size and habit load times before and after archiving.
+
+    "runs" loads the habits and computes their completion rates and streaks from the completion runs,
+    as the analytics report does. "dates" additionally builds each habit's full list of completion dates.
+    """
+    analytics = Analytics(None)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'benchmark.db')
+    db = SQLiteDB(path)
+    try:
+        for _, habit in habits:
+            habit_id = db.storeHabit(habit)
+            db.conn.executemany('''INSERT INTO CompletionRecords (habit_id, completionDate) VALUES (?, ?)''',
+                                [(habit_id, datetime.date.fromordinal(ordinal).isoformat())
+                                 for start, end in habit.completionRuns for ordinal in range(start, end + 1)])
+        db.conn.commit()
+
+        def load_runs():
+            for _, habit in db.getAllHabits():
+                analytics.calculateCompletionPercentageFromRuns(habit)
+                habit.calculateStreakFromRuns()
+
+        def load_dates():
+            for _, habit in db.getAllHabits():
+                habit.completionHistory
+
+        def measure():
+            runs = 5
+            return (f"runs {timeit.timeit(load_runs, number=runs) / runs * 1000:7.2f} ms, "
+                    f"dates {timeit.timeit(load_dates, number=runs) / runs * 1000:7.2f} ms")
+
+        def size():
+            db.conn.execute('''VACUUM''')
+            return os.path.getsize(path) / 1024
+
+        rows = db.conn.execute('''SELECT COUNT(*) FROM CompletionRecords''').fetchone()[0]
+        print(f"  Before: {size():7.1f} KiB, load {measure()} ({rows} rows)")
+
+        db.archiveCompletionHistory(RETENTION_DAYS)
+        rows = db.conn.execute('''SELECT COUNT(*) FROM CompletionRecords''').fetchone()[0]
+        run_count = db.conn.execute('''SELECT COUNT(*) FROM CompletionRuns''').fetchone()[0]
+        print(f"  After:  {size():7.1f} KiB, load {measure()} ({rows} rows, {run_count} runs)")
+    finally:
+        db.close()
+        os.remove(path)
+        os.rmdir(directory)
+
+def main():
+    random.seed(0)
+    habits = [(habit_id, build_habit(YEARS)) for habit_id in range(1, HABITS + 1)]
+
+    def prefix_sum():
+        # A fresh Analytics instance so the cache is not reused between runs
+        analytics = Analytics(None)
+        for habit_id, habit in habits:
+            analytics.calculateRollingRates(habit_id, habit, WINDOW)
+
+    def naive():
+        for habit_id, habit in habits:
+            naive_rolling_rates(habit, WINDOW)
+
+    analytics = Analytics(None)
+    def cached():
+        for habit_id, habit in habits:
+            analytics.calculateTrends(habit_id, habit)
+    cached()
+
+    runs = 3
+    print(f"{HABITS} daily habits with {YEARS} years of history, {WINDOW}-day rolling window")
+    print(f"  Recount each window:  {timeit.timeit(naive, number=runs) / runs * 1000:10.2f} ms")
+    print(f"  Prefix-sum array:     {timeit.timeit(prefix_sum, number=runs) / runs * 1000:10.2f} ms")
+    print(f"  Cached trends report: {timeit.timeit(cached, number=runs) / runs * 1000:10.2f} ms")
+
+    for completion_rate in (0.8, 0.99):
+        print(f"\n{HABITS} daily habits with {YEARS} years of history, {completion_rate:.0%} of days completed, "
+              f"archiving history older than {RETENTION_DAYS} days")
+        benchmark_archive([(habit_id, build_habit(YEARS, completion_rate)) for habit_id in range(1, HABITS + 1)])
+
+if __name__ == '__main__':
+    main()
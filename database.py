@@ -1,12 +1,20 @@
 import sqlite3
 import datetime
-from habit import Habit
+from habit import Habit, mergeRuns
+
+# Current schema version, stored in the database's user_version pragma
+SCHEMA_VERSION = 1
 
 # Define the SQLiteDB class to handle database interaction
 class SQLiteDB:
-    def __init__(self, db_name='habits.db'):
+    def __init__(self, db_name='habits.db', retention_days=None):
+        """Open the database. If retention_days is given, completions older than that are archived into runs."""
         self.conn = sqlite3.connect(db_name)
         self.create_tables()
+        self.migrate()
+        self.retention_days = retention_days
+        if retention_days is not None:
+            self.archiveCompletionHistory()
 
     def create_tables(self):
         c = self.conn.cursor()
@@ -28,6 +36,48 @@ class SQLiteDB:
                     )''')
         self.conn.commit()
 
+    def migrate(self):
+        """Upgrade an existing database to the current schema version."""
+        c = self.conn.cursor()
+        version = c.execute('''PRAGMA user_version''').fetchone()[0]
+        if version < 1:
+            # Version 1: archived completion history stored as runs of consecutive day ordinals
+            c.execute('''CREATE TABLE IF NOT EXISTS CompletionRuns (
+                            habit_id INTEGER,
+                            start_ordinal INTEGER,
+                            end_ordinal INTEGER,
+                            PRIMARY KEY (habit_id, start_ordinal),
+                            FOREIGN KEY (habit_id) REFERENCES Habits(id)
+                        ) WITHOUT ROWID''')
+            c.execute('''CREATE INDEX IF NOT EXISTS idx_completion_records_habit ON CompletionRecords (habit_id)''')
+        c.execute(f'''PRAGMA user_version = {SCHEMA_VERSION}''')
+        self.conn.commit()
+
+    def archiveCompletionHistory(self, retention_days=None):
+        """Compact completion records older than retention_days (by default the database's own) into runs."""
+        if retention_days is None:
+            retention_days = self.retention_days
+        if retention_days is None:
+            return  # Archiving is not enabled for this database
+        cutoff = datetime.date.today() - datetime.timedelta(days=retention_days)
+        c = self.conn.cursor()
+        c.execute('''SELECT DISTINCT habit_id FROM CompletionRecords WHERE completionDate < ?''', (cutoff.isoformat(),))
+        habit_ids = [row[0] for row in c.fetchall()]
+
+        for habit_id in habit_ids:
+            c.execute('''SELECT completionDate FROM CompletionRecords WHERE habit_id=? AND completionDate < ?''',
+                      (habit_id, cutoff.isoformat()))
+            ordinals = [datetime.date.fromisoformat(d[0]).toordinal() for d in c.fetchall()]
+            c.execute('''SELECT start_ordinal, end_ordinal FROM CompletionRuns WHERE habit_id=?''', (habit_id,))
+            runs = mergeRuns(c.fetchall() + [(ordinal, ordinal) for ordinal in ordinals])
+
+            c.execute('''DELETE FROM CompletionRuns WHERE habit_id=?''', (habit_id,))
+            c.executemany('''INSERT INTO CompletionRuns (habit_id, start_ordinal, end_ordinal) VALUES (?, ?, ?)''',
+                          [(habit_id, start, end) for start, end in runs])
+            c.execute('''DELETE FROM CompletionRecords WHERE habit_id=? AND completionDate < ?''',
+                      (habit_id, cutoff.isoformat()))
+        self.conn.commit()
+
     def storeHabit(self, habit):
         c = self.conn.cursor()
         c.execute('''INSERT INTO Habits (title, description, periodicity, creationDate, streak, lastCompletionDate, category)
@@ -49,12 +99,14 @@ class SQLiteDB:
         c = self.conn.cursor()
         c.execute('''DELETE FROM Habits WHERE id=?''', (habit_id,))
         c.execute('''DELETE FROM CompletionRecords WHERE habit_id=?''', (habit_id,))
+        c.execute('''DELETE FROM CompletionRuns WHERE habit_id=?''', (habit_id,))
         self.conn.commit()
 
     def clearTables(self):
         c = self.conn.cursor()
         c.execute('''DELETE FROM Habits''')
         c.execute('''DELETE FROM CompletionRecords''')
+        c.execute('''DELETE FROM CompletionRuns''')
         # Reset the autoincrement by deleting the relevant row in sqlite_sequence
         c.execute('''DELETE FROM sqlite_sequence WHERE name='Habits' ''')
         c.execute('''DELETE FROM sqlite_sequence WHERE name='CompletionRecords' ''')
@@ -75,7 +127,7 @@ class SQLiteDB:
             habit.creationDate = datetime.date.fromisoformat(row[4])
             habit.streak = row[5]
             habit.lastCompletionDate = datetime.date.fromisoformat(row[6]) if row[6] else None
-            habit.completionHistory = self.getCompletionHistory(habit_id)
+            habit.completionRuns = self.getCompletionRuns(habit_id)
             return habit
         else:
             return None
@@ -91,15 +143,25 @@ class SQLiteDB:
             habit.streak = row[5]
             habit.lastCompletionDate = datetime.date.fromisoformat(row[6]) if row[6] else None
             habit_id = row[0]
-            habit.completionHistory = self.getCompletionHistory(habit_id)
+            habit.completionRuns = self.getCompletionRuns(habit_id)
             habits.append((habit_id, habit))
         return habits
 
     def getCompletionHistory(self, habit_id):
+        """Return the habit's distinct completion dates in order, consistent with getCompletionRuns."""
+        return [datetime.date.fromordinal(ordinal)
+                for start, end in self.getCompletionRuns(habit_id) for ordinal in range(start, end + 1)]
+
+    def getCompletionRuns(self, habit_id):
+        """Return the habit's completions as sorted (start_ordinal, end_ordinal) runs of consecutive days."""
         c = self.conn.cursor()
+        c.execute('''SELECT start_ordinal, end_ordinal FROM CompletionRuns WHERE habit_id=?''', (habit_id,))
+        runs = c.fetchall()
         c.execute('''SELECT completionDate FROM CompletionRecords WHERE habit_id=?''', (habit_id,))
-        dates = c.fetchall()
-        return [datetime.date.fromisoformat(d[0]) for d in dates]
+        for d in c.fetchall():
+            ordinal = datetime.date.fromisoformat(d[0]).toordinal()
+            runs.append((ordinal, ordinal))
+        return mergeRuns(runs)
 
     def getHabitsByPeriodicity(self, periodicity):
         c = self.conn.cursor()
@@ -112,7 +174,7 @@ class SQLiteDB:
             habit.streak = row[5]
             habit.lastCompletionDate = datetime.date.fromisoformat(row[6]) if row[6] else None
             habit_id = row[0]
-            habit.completionHistory = self.getCompletionHistory(habit_id)
+            habit.completionRuns = self.getCompletionRuns(habit_id)
             habits.append((habit_id, habit))
         return habits
 
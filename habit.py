@@ -1,12 +1,24 @@
 import datetime
 
+def mergeRuns(runs):
+    """Sort (start_ordinal, end_ordinal) runs and merge any that overlap or are on consecutive days."""
+    merged = []
+    for start, end in sorted(runs):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
 class Habit:
     def __init__(self, title, description=None, periodicity='daily', category=None):
         self.title = title
         self.description = description
         self.periodicity = periodicity  # 'daily' or 'weekly'
         self.creationDate = datetime.date.today()
-        self.completionHistory = []
+        self._completionHistory = []
+        self._completionRuns = []
         self.streak = 0
         self.lastCompletionDate = None
         self.category = category
@@ -14,10 +26,40 @@ class Habit:
     def completeTask(self):
         today = datetime.date.today()
         if self.lastCompletionDate != today:  # Only complete if not already done today
-            self.completionHistory.append(today)
+            if self._completionHistory is None:
+                # Only the runs are loaded, so extend them rather than building the date list
+                self._completionRuns = mergeRuns(self._completionRuns + [(today.toordinal(), today.toordinal())])
+            else:
+                self.completionHistory.append(today)
             self.updateStreak(today)
             self.lastCompletionDate = today
 
+    @property
+    def completionHistory(self):
+        """List of completion dates, built from the completion runs the first time it is needed."""
+        if self._completionHistory is None:
+            self._completionHistory = [datetime.date.fromordinal(ordinal)
+                                       for start, end in self._completionRuns for ordinal in range(start, end + 1)]
+        return self._completionHistory
+
+    @completionHistory.setter
+    def completionHistory(self, dates):
+        self._completionHistory = dates
+
+    @property
+    def completionRuns(self):
+        """Sorted (start_ordinal, end_ordinal) runs of consecutive completion days."""
+        if self._completionHistory is not None:
+            # Once the date list exists it is the source of truth, so edits made to it are always reflected
+            return mergeRuns((date.toordinal(), date.toordinal()) for date in self._completionHistory)
+        return self._completionRuns
+
+    @completionRuns.setter
+    def completionRuns(self, runs):
+        # The date list is only built from the runs if something asks for it
+        self._completionRuns = runs
+        self._completionHistory = None
+
     def updateStreak(self, date):
         if self.lastCompletionDate is None:
             self.streak = 1
@@ -48,4 +90,30 @@ class Habit:
                     streak = 1
             last_date = date
         self.streak = streak  # Ensure the streak is stored in the class variable
-        return streak
\ No newline at end of file
+        return streak
+
+    def calculateStreakFromRuns(self):
+        """Recalculate the streak from the completion runs without building the list of dates."""
+        runs = self.completionRuns
+        streak = 0
+        last_ordinal = None
+        for start, end in runs:
+            if last_ordinal is None:
+                streak = 1
+            else:
+                delta = start - last_ordinal
+                if self.periodicity == 'daily' and delta == 1:
+                    streak += 1
+                elif self.periodicity == 'weekly' and 7 <= delta < 14:
+                    streak += 1
+                else:
+                    streak = 1
+            # Each remaining day of the run is one day after the previous completion
+            if end > start:
+                if self.periodicity == 'daily':
+                    streak += end - start
+                else:
+                    streak = 1
+            last_ordinal = end
+        self.streak = streak
+        return streak
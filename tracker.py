@@ -7,6 +7,8 @@ from analytics import Analytics
 class HabitTracker:
     def __init__(self):
         self.db = SQLiteDB()
+        # Kept for the lifetime of the tracker so cached trend data is reused between reports
+        self.analytics = Analytics(self.db)
         self.add_predefined_habits()
 
     def add_predefined_habits(self):
@@ -109,8 +111,7 @@ class HabitTracker:
         self._displayHabits(habits)
 
     def viewAnalytics(self):
-        analytics = Analytics(self.db)
-        analytics.showAnalytics()
+        self.analytics.showAnalytics()
 
     def editHabit(self, habit_id):
         habit = self.db.getHabit(habit_id)
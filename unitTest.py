@@ -1,6 +1,10 @@
 import unittest
 import datetime
+import os
+import sqlite3
+import tempfile
 from analytics import Analytics
+from database import SQLiteDB
 from tracker import HabitTracker
 
 class TestHabitTracker(unittest.TestCase):
@@ -100,6 +104,194 @@ class TestHabitTracker(unittest.TestCase):
         longest_streak_habit = max(habits, key=lambda h: h[1].streak)[1]
         self.assertEqual(longest_streak_habit.streak, 30, "The longest streak should be 30")
 
+    def test_analytics_trends(self):
+        """Test rolling completion rates and period-over-period changes."""
+        analytics = Analytics(self.db)
+        habit = self.db.getHabit(1)  # 'Drink Water' habit, completed every day for the last 28 days (not today)
+
+        trends = analytics.calculateTrends(1, habit)
+        current_rate, previous_rate, delta = trends[7]
+        self.assertAlmostEqual(current_rate, 6 / 7 * 100)
+        self.assertAlmostEqual(previous_rate, 100)
+        self.assertAlmostEqual(delta, 6 / 7 * 100 - 100)
+
+        # The 30-day window only covers the days since the first completion
+        self.assertAlmostEqual(trends[30][0], 28 / 29 * 100)
+        self.assertIsNone(trends[30][1], "There is no previous 30-day period before the first completion")
+
+        # Rolling rates agree with recounting each window directly
+        rates = analytics.calculateRollingRates(1, habit, 7)
+        history = set(habit.completionHistory)
+        first_date = min(history)
+        for date, rate in rates:
+            start = max(first_date, date - datetime.timedelta(days=6))
+            days = (date - start).days + 1
+            completions = sum(1 for i in range(days) if start + datetime.timedelta(days=i) in history)
+            self.assertAlmostEqual(rate, completions / days * 100)
+
+    def test_analytics_trends_future_completion(self):
+        """Test that completions dated after today do not break the trends report."""
+        analytics = Analytics(self.db)
+        self.tracker.createHabit("Future Habit", "Completed ahead of time", "daily", "Testing")
+        tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+        self.db.storeCompletionRecord(6, tomorrow)
+        habit = self.db.getHabit(6)
+
+        self.assertEqual(analytics.calculateTrends(6, habit)[7], (0, None, None))
+        self.assertEqual(analytics.calculateRollingRates(6, habit, 7), [])
+        analytics.showTrends()
+
+    def test_analytics_trends_cache(self):
+        """Test that cached trends are recomputed once new completions arrive."""
+        analytics = Analytics(self.db)
+        habit = self.db.getHabit(1)
+        self.assertAlmostEqual(analytics.calculateTrends(1, habit)[7][0], 6 / 7 * 100)
+
+        self.tracker.completeHabitTask(1)
+        habit = self.db.getHabit(1)
+        self.assertAlmostEqual(analytics.calculateTrends(1, habit)[7][0], 100)
+
+        # Edits that keep the number of completions and the latest date are also picked up
+        today = datetime.date.today()
+        habit.completionHistory = [today - datetime.timedelta(days=3), today]
+        self.assertAlmostEqual(analytics.calculateTrends(1, habit)[7][0], 50)
+        habit.completionHistory = [today - datetime.timedelta(days=1), today]
+        self.assertAlmostEqual(analytics.calculateTrends(1, habit)[7][0], 100)
+
+        # So are edits made to the completion history in place
+        habit.completionHistory.remove(today)
+        habit.completionHistory.append(today - datetime.timedelta(days=5))
+        self.assertAlmostEqual(analytics.calculateTrends(1, habit)[7][0], 2 / 6 * 100)
+        habit.completionHistory[0] = today
+        self.assertAlmostEqual(analytics.calculateTrends(1, habit)[7][0], 2 / 6 * 100)
+        habit.completionHistory[1] = today - datetime.timedelta(days=2)
+        self.assertAlmostEqual(analytics.calculateTrends(1, habit)[7][0], 2 / 3 * 100)
+
+    def test_analytics_trends_cache_eviction(self):
+        """Test that cached trends for deleted habits are dropped by the next report."""
+        analytics = self.tracker.analytics
+        analytics.showTrends()
+        self.assertIn(1, analytics._prefixCache)
+
+        self.tracker.deleteHabit(1, confirm_delete=True)
+        analytics.showTrends()
+        self.assertNotIn(1, analytics._prefixCache)
+        self.assertIn(2, analytics._prefixCache)
+
+    def test_archive_completion_history(self):
+        """Test that archiving old completions into runs preserves history, streaks and completion rates."""
+        analytics = Analytics(self.db)
+        habits_before = {habit_id: habit for habit_id, habit in self.db.getAllHabits()}
+        rates_before = {habit_id: analytics.calculateCompletionPercentage(habit) for habit_id, habit in habits_before.items()}
+
+        # Keep only the last 10 days as individual rows
+        self.db.archiveCompletionHistory(10)
+        c = self.db.conn.cursor()
+        remaining = c.execute('''SELECT COUNT(*) FROM CompletionRecords WHERE habit_id=1''').fetchone()[0]
+        self.assertEqual(remaining, 10, "Only completions within the retention horizon should remain as rows")
+        runs = c.execute('''SELECT start_ordinal, end_ordinal FROM CompletionRuns WHERE habit_id=1''').fetchall()
+        self.assertEqual(len(runs), 1, "Consecutive daily completions should be compacted into a single run")
+
+        today = datetime.date.today().toordinal()
+        self.assertEqual(self.db.getCompletionRuns(1), [(today - 28, today - 1)])
+
+        for habit_id, habit in self.db.getAllHabits():
+            self.assertEqual(sorted(habit.completionHistory), sorted(habits_before[habit_id].completionHistory))
+            self.assertEqual(habit.completionRuns, self.db.getCompletionRuns(habit_id))
+            self.assertEqual(habit.calculateStreakFromRuns(), habit.calculateStreak())
+            self.assertEqual(analytics.calculateCompletionPercentageFromRuns(habit), rates_before[habit_id])
+
+        # Archiving again merges new rows into the existing runs
+        self.db.archiveCompletionHistory(0)
+        self.assertEqual(self.db.getCompletionRuns(1), [(today - 28, today - 1)])
+        remaining = c.execute('''SELECT COUNT(*) FROM CompletionRecords''').fetchone()[0]
+        self.assertEqual(remaining, 0)
+
+    def test_completion_on_archived_day(self):
+        """Test that a completion stored on an already archived day is not counted twice."""
+        analytics = Analytics(self.db)
+        self.db.archiveCompletionHistory(0)
+        self.db.storeCompletionRecord(1, datetime.date.today() - datetime.timedelta(days=5))
+
+        history = self.db.getCompletionHistory(1)
+        self.assertEqual(len(history), 28)
+        self.assertEqual(len(history), len(set(history)))
+
+        habit = self.db.getHabit(1)
+        habit.completionHistory = history
+        self.assertEqual(habit.calculateStreak(), 28)
+        self.assertEqual(habit.calculateStreakFromRuns(), 28)
+        self.assertEqual(analytics.calculateCompletionPercentage(habit), analytics.calculateCompletionPercentageFromRuns(habit))
+
+    def test_complete_task_with_loaded_runs(self):
+        """Test that completing a habit loaded as completion runs updates its runs, history and streak."""
+        self.db.archiveCompletionHistory(10)
+        habit = self.db.getHabit(1)
+        today = datetime.date.today()
+
+        habit.completeTask()
+        self.assertEqual(habit.completionRuns, [(today.toordinal() - 28, today.toordinal())])
+        self.assertEqual(habit.calculateStreakFromRuns(), 29)
+        self.assertEqual(len(habit.completionHistory), 29)
+        self.assertIn(today, habit.completionHistory)
+
+    def test_completion_runs_follow_history_edits(self):
+        """Test that in-place edits to the completion history that keep its length are reflected in the runs."""
+        analytics = Analytics(self.db)
+        habit = self.db.getHabit(1)
+        today = datetime.date.today()
+        habit.completionHistory = [today - datetime.timedelta(days=3), today]
+        self.assertEqual(len(habit.completionRuns), 2)
+
+        habit.completionHistory[0] = today - datetime.timedelta(days=1)
+        self.assertEqual(habit.completionRuns, [(today.toordinal() - 1, today.toordinal())])
+        self.assertEqual(habit.calculateStreakFromRuns(), habit.calculateStreak())
+        self.assertEqual(analytics.calculateCompletionPercentageFromRuns(habit), analytics.calculateCompletionPercentage(habit))
+
+        habit.completionHistory.remove(today)
+        habit.completionHistory.append(today - datetime.timedelta(days=5))
+        self.assertEqual(habit.completionRuns, [(today.toordinal() - 5, today.toordinal() - 5),
+                                                (today.toordinal() - 1, today.toordinal() - 1)])
+        self.assertEqual(habit.calculateStreakFromRuns(), habit.calculateStreak())
+        self.assertEqual(analytics.calculateCompletionPercentageFromRuns(habit), analytics.calculateCompletionPercentage(habit))
+
+    def test_migrate_existing_database(self):
+        """Test that a database created before completion runs existed is migrated and archived on open."""
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            conn = sqlite3.connect(path)
+            conn.execute('''CREATE TABLE Habits (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, description TEXT,
+                            periodicity TEXT, creationDate TEXT, streak INTEGER, lastCompletionDate TEXT, category TEXT)''')
+            conn.execute('''CREATE TABLE CompletionRecords (id INTEGER PRIMARY KEY AUTOINCREMENT, habit_id INTEGER,
+                            completionDate TEXT)''')
+            conn.execute('''INSERT INTO Habits (title, periodicity, creationDate, streak) VALUES ('Old Habit', 'daily', ?, 3)''',
+                         (datetime.date(2020, 1, 1).isoformat(),))
+            for day in range(1, 4):
+                conn.execute('''INSERT INTO CompletionRecords (habit_id, completionDate) VALUES (1, ?)''',
+                             (datetime.date(2020, 1, day).isoformat(),))
+            conn.commit()
+            conn.close()
+
+            db = SQLiteDB(path, retention_days=30)
+            try:
+                habit = db.getHabit(1)
+                self.assertEqual(habit.completionHistory, [datetime.date(2020, 1, day) for day in range(1, 4)])
+                self.assertEqual(db.getCompletionRuns(1),
+                                 [(datetime.date(2020, 1, 1).toordinal(), datetime.date(2020, 1, 3).toordinal())])
+                self.assertEqual(db.conn.execute('''SELECT COUNT(*) FROM CompletionRecords''').fetchone()[0], 0)
+
+                # Later archiving uses the database's retention horizon by default
+                db.storeCompletionRecord(1, datetime.date(2020, 1, 4))
+                db.archiveCompletionHistory()
+                self.assertEqual(db.getCompletionRuns(1),
+                                 [(datetime.date(2020, 1, 1).toordinal(), datetime.date(2020, 1, 4).toordinal())])
+                self.assertEqual(db.conn.execute('''SELECT COUNT(*) FROM CompletionRecords''').fetchone()[0], 0)
+            finally:
+                db.close()
+        finally:
+            os.remove(path)
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -113,4 +305,7 @@ What This Test Suite Covers:
     4. Task Completion and Streak Update: Ensures that completing a task correctly updates the streak.
     5. Streak Calculation: Ensures streaks are calculated accurately based on the habit's completion history.
     6. Analytics (Longest Streak): Tests the calculation of the longest streak among all habits.
+    7. Analytics (Trends): Tests rolling completion rates, period-over-period changes and their caching.
+    8. Archived History: Ensures completions compacted into runs keep the same history, streaks and completion rates.
+    9. Migration: Ensures databases from before completion runs existed are upgraded and archived on open.
 """
\ No newline at end of file